@@ -1,6 +1,7 @@
-import os, sqlite3
+import os, re, sys, hmac, sqlite3, threading, time, itertools, datetime as dt
+from collections import OrderedDict
 from pathlib import Path
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Header
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
@@ -10,7 +11,28 @@ from fastapi.middleware.cors import CORSMiddleware
 ROOT_ENV = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(dotenv_path=ROOT_ENV)
 
-DB_PATH = Path("pagos.db")
+# Lógica compartida con los scripts (participantes del sorteo, chances por promo, nombres enmascarados)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from promos import chances_de, enmascarar  # noqa: E402
+from sortear_mp import iter_participantes  # noqa: E402
+
+# En producción apunta al snapshot que publica sync_mp.py --snapshot (ver README)
+DB_PATH = Path(os.getenv("PAGOS_DB", "pagos.db"))
+# Lecturas vía mmap: los workers comparten las páginas del snapshot en el page cache del SO
+MMAP_SIZE = int(os.getenv("PAGOS_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Pagos viejos movidos por scripts/archivar_mp.py; sólo se consultan si no están en DB_PATH
+ARCHIVE_PATH = Path(os.getenv("PAGOS_ARCHIVE", "pagos_archivo.db"))
+# Segundos que se reutiliza una respuesta de /stats (se invalida también con cada snapshot)
+STATS_TTL = float(os.getenv("STATS_TTL", "30"))
+# Rate limit de /verificar por IP: VERIFY_RATE consultas/seg sostenidas, ráfagas de VERIFY_BURST
+VERIFY_RATE = float(os.getenv("VERIFY_RATE", "2"))
+VERIFY_BURST = float(os.getenv("VERIFY_BURST", "10"))
+# Detrás de Caddy la IP real viene en X-Forwarded-For
+TRUST_PROXY = os.getenv("TRUST_PROXY", "0") == "1"
+# Token para GET /buscar (soporte). Sin token configurado el endpoint queda deshabilitado.
+SUPPORT_API_TOKEN = os.getenv("SUPPORT_API_TOKEN")
+# Token para ver montos y desgloses en GET /stats. Sin token sólo se publican las chances vendidas.
+STATS_API_TOKEN = os.getenv("STATS_API_TOKEN")
 
 app = FastAPI(title="Verificador de participación", version="1.0.0")
 
@@ -22,17 +44,161 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos los encabezados
 )
 
-def db():
-    conn = sqlite3.connect(DB_PATH)
+_local = threading.local()
+
+def _snapshot_id():
+    # sync_mp.py publica cada snapshot con un rename atómico: cambia el inodo
+    st = DB_PATH.stat()
+    return (st.st_ino, st.st_mtime_ns, ARCHIVE_PATH.exists())
+
+def _open_ro():
+    uri = f"file:{DB_PATH.resolve().as_posix()}"
+    intentos = [
+        lambda: sqlite3.connect(f"{uri}?mode=ro", uri=True, check_same_thread=False),
+        # DB en WAL sin permiso para crear -shm (entorno de desarrollo): abrimos rw
+        # y forzamos query_only igual que scripts/query_payment.py
+        lambda: sqlite3.connect(DB_PATH, check_same_thread=False),
+    ]
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    if not (wal.exists() and wal.stat().st_size):
+        # ni el archivo ni el directorio son escribibles: sin WAL pendiente todo está en
+        # el archivo principal y se puede leer como inmutable (se reabre al cambiar el mtime)
+        intentos.append(lambda: sqlite3.connect(f"{uri}?mode=ro&immutable=1", uri=True, check_same_thread=False))
+    for abrir in intentos:
+        conn = None
+        try:
+            conn = abrir()
+            # abrir no toca el archivo: el error de -shm recién aparece en la primera lectura
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            break
+        except sqlite3.OperationalError:
+            if conn is not None:
+                conn.close()
+            if abrir is intentos[-1]:
+                raise
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    if ARCHIVE_PATH.exists():
+        conn.execute("ATTACH DATABASE ? AS archivo", (f"file:{ARCHIVE_PATH.resolve().as_posix()}?mode=ro",))
+    conn.execute("PRAGMA query_only = ON")
     conn.row_factory = sqlite3.Row
     return conn
 
-def enmascarar(nombre: str | None):
-    if not nombre: return None
-    parts = nombre.strip().split()
-    if len(parts) >= 2:
-        return f"{parts[0]} {parts[1][0]}."
-    return parts[0]
+VERIFY_SQL = """
+  SELECT numero_operacion, status, amount, currency, date_approved, payer_name, description
+  FROM {schema}.pagos {hint} WHERE numero_operacion = ?
+"""
+# Índice de cobertura creado por la migración 3 de sync_mp.py. SQLite prefiere el índice
+# del UNIQUE (que obliga a leer la fila con raw), así que se pide explícitamente.
+VERIFY_INDEX = "idx_pagos_verificar"
+
+def _verify_hints(conn) -> dict[str, str]:
+    """Por cada base adjunta ('main', 'archivo'), la pista INDEXED BY si tiene el índice."""
+    hints = {}
+    for _, name, _file in conn.execute("PRAGMA database_list").fetchall():
+        tiene = conn.execute(
+            f"SELECT 1 FROM {name}.sqlite_master WHERE type='index' AND name=?", (VERIFY_INDEX,)
+        ).fetchone()
+        hints[name] = f"INDEXED BY {VERIFY_INDEX}" if tiene else ""
+    return hints
+
+def db():
+    """Conexión de sólo lectura por hilo, reabierta cuando se publica un snapshot nuevo."""
+    snap = _snapshot_id()
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.snap != snap:
+        if conn is not None:
+            conn.close()
+        _local.conn = conn = _open_ro()
+        _local.snap = snap
+        _local.verify_hints = _verify_hints(conn)
+    return conn
+
+class TokenBucketLimiter:
+    """Token bucket por clave (IP) en memoria del proceso, acotado a max_keys claves (LRU)."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 50_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> tuple[bool, float]:
+        """Devuelve (permitido, segundos hasta el próximo token)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            # se reinserta al final: el primero es siempre la IP que hace más que no consulta,
+            # cuyo bucket es el más lleno y el más barato de olvidar
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return (True, 0.0) if permitido else (False, (1 - tokens) / self.rate)
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución."""
+
+    def __init__(self):
+        self._calls: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        """Devuelve (resultado, compartido); compartido=True si esperó a otra llamada."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+        try:
+            call["result"] = fn()
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+        return call["result"], False
+
+class Metrics:
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+verify_limiter = TokenBucketLimiter(VERIFY_RATE, VERIFY_BURST)
+verify_flight = SingleFlight()
+metrics = Metrics()
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY:
+        fwd = request.headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",")[0].strip()
+    return request.client.host if request.client else "desconocido"
+
+def enmascarar_email(email: str | None):
+    if not email or "@" not in email: return None
+    user, domain = email.split("@", 1)
+    if not user:
+        return f"***@{domain}"
+    return f"{user[0]}***@{domain}"
 
 class VerifyResponse(BaseModel):
     verified: bool
@@ -49,14 +215,55 @@ class VerifyResponse(BaseModel):
 def health():
     return {"ok": True}
 
-@app.get("/verificar", response_model=VerifyResponse)
-def verificar(op: str = Query(..., min_length=6, max_length=24, pattern=r"^\d+$")):
-    # solo dígitos; el "numero_operacion" es el payment.id canonizado
+@app.get("/ready")
+def ready():
+    # listo sólo si el snapshot existe y tiene la tabla pagos
+    try:
+        with db() as conn:
+            conn.execute("SELECT 1 FROM pagos LIMIT 1").fetchall()
+        mtime = DB_PATH.stat().st_mtime
+    except (OSError, sqlite3.Error) as e:
+        return JSONResponse(status_code=503, content={"ok": False, "error": str(e)})
+    return {"ok": True, "snapshot": dt.datetime.fromtimestamp(mtime, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # contadores de este worker (cada proceso de uvicorn tiene los suyos)
+    counts = metrics.snapshot()
+    consultas = counts.get("verificar_db_queries", 0)
+    compartidas = counts.get("verificar_coalesced", 0)
+    return {
+        "pid": os.getpid(),
+        "counters": counts,
+        "rate_limit_buckets": len(verify_limiter._buckets),
+        "coalescing_ratio": round(compartidas / (consultas + compartidas), 4) if consultas + compartidas else None,
+    }
+
+def _buscar_pago(op: str):
     with db() as conn:
-        row = conn.execute("""
-          SELECT numero_operacion, status, amount, currency, date_approved, payer_name, description
-          FROM pagos WHERE numero_operacion = ?
-        """, (op,)).fetchone()
+        hints = _local.verify_hints
+        row = conn.execute(VERIFY_SQL.format(schema="main", hint=hints["main"]), (op,)).fetchone()
+        if row is None and "archivo" in hints:
+            metrics.inc("verificar_archive_lookups")
+            row = conn.execute(VERIFY_SQL.format(schema="archivo", hint=hints["archivo"]), (op,)).fetchone()
+        return row
+
+@app.get("/verificar", response_model=VerifyResponse)
+def verificar(request: Request, op: str = Query(..., min_length=6, max_length=24, pattern=r"^\d+$")):
+    permitido, espera = verify_limiter.allow(client_ip(request))
+    if not permitido:
+        metrics.inc("rate_limit_rejected")
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(1, round(espera)))},
+            content={"verified": False, "mensaje": "Demasiadas consultas. Esperá unos segundos y volvé a intentar."},
+        )
+    metrics.inc("rate_limit_allowed")
+
+    # solo dígitos; el "numero_operacion" es el payment.id canonizado.
+    # Consultas simultáneas por el mismo op comparten una sola lectura de la DB.
+    row, compartida = verify_flight.do(op, lambda: _buscar_pago(op))
+    metrics.inc("verificar_coalesced" if compartida else "verificar_db_queries")
 
     if not row:
         return VerifyResponse(
@@ -76,3 +283,284 @@ def verificar(op: str = Query(..., min_length=6, max_length=24, pattern=r"^\d+$"
         description=row["description"],
         mensaje= "El número de operación fue verificado con éxito." if aprobado else "Pago aún no acreditado."
     )
+
+class GanadorResponse(BaseModel):
+    puesto: int
+    ticket: str
+    payer_name: str | None = None
+    chances: int
+
+class SorteoResponse(BaseModel):
+    id: int
+    seed: str
+    filtro: str | None = None
+    premio: str | None = None
+    participantes: int
+    chances: int
+    corte: str | None = None
+    participantes_sha256: str | None = None
+    fecha: str | None = None
+    ganadores: list[GanadorResponse]
+
+@app.get("/sorteos/{sorteo_id}", response_model=SorteoResponse)
+def sorteo(sorteo_id: int):
+    # resultado publicado por scripts/sortear_mp.py; con la semilla cualquiera puede re-ejecutarlo
+    try:
+        with db() as conn:
+            row = conn.execute("SELECT * FROM sorteos WHERE id = ?", (sorteo_id,)).fetchone()
+            ganadores = conn.execute("""
+              SELECT puesto, ticket, payer_name, chances
+              FROM sorteo_ganadores WHERE sorteo_id = ? ORDER BY puesto
+            """, (sorteo_id,)).fetchall() if row else []
+    except sqlite3.OperationalError:
+        row = None
+    if not row:
+        return JSONResponse(status_code=404, content={"mensaje": "Sorteo no encontrado."})
+
+    return SorteoResponse(
+        id=row["id"],
+        seed=row["seed"],
+        filtro=row["filtro"],
+        premio=row["premio"],
+        participantes=row["participantes"],
+        chances=row["chances"],
+        corte=row["corte"],
+        participantes_sha256=row["participantes_sha256"],
+        fecha=row["created_at"],
+        ganadores=[GanadorResponse(
+            puesto=g["puesto"],
+            ticket=g["ticket"],
+            payer_name=enmascarar(g["payer_name"]),
+            chances=g["chances"],
+        ) for g in ganadores],
+    )
+
+class ParticipanteResponse(BaseModel):
+    numero_operacion: str
+    payer_name: str | None = None
+    chances: int
+
+class ParticipantesResponse(BaseModel):
+    participantes: list[ParticipanteResponse]
+    siguiente: int | None = None
+
+@app.get("/sorteos/{sorteo_id}/participantes", response_model=ParticipantesResponse)
+def sorteo_participantes(
+    sorteo_id: int,
+    despues_de: int | None = Query(None, description="Cursor devuelto en 'siguiente'"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    # Mismo recorrido y orden que el sha256 publicado en /sorteos/{id}: concatenando
+    # "numero_operacion:chances\n" de todas las páginas se obtiene el mismo hash.
+    try:
+        with db() as conn:
+            row = conn.execute("SELECT filtro, corte FROM sorteos WHERE id = ?", (sorteo_id,)).fetchone()
+            if row and row["corte"]:
+                pagina = list(itertools.islice(
+                    iter_participantes(conn, row["filtro"], row["corte"], despues_de), limit + 1))
+    except sqlite3.OperationalError:
+        row = None
+    if not row:
+        return JSONResponse(status_code=404, content={"mensaje": "Sorteo no encontrado."})
+    if not row["corte"]:
+        return JSONResponse(status_code=404, content={"mensaje": "El sorteo no registró su corte de participantes."})
+
+    siguiente = pagina[limit - 1]["payment_id"] if len(pagina) > limit else None
+    return ParticipantesResponse(
+        participantes=[ParticipanteResponse(
+            numero_operacion=p["numero_operacion"],
+            payer_name=enmascarar(p["payer_name"]),
+            chances=chances_de(p["description"]),
+        ) for p in pagina[:limit]],
+        siguiente=siguiente,
+    )
+
+class StatsGrupo(BaseModel):
+    clave: str
+    pagos: int
+    aprobados: int
+    monto_aprobado: float
+    chances: int
+
+class StatsResponse(BaseModel):
+    desde: str | None = None
+    hasta: str | None = None
+    chances_vendidas: int
+    # sólo con STATS_API_TOKEN
+    pagos: int | None = None
+    aprobados: int | None = None
+    tasa_aprobacion: float | None = None
+    monto_total: float | None = None
+    monto_aprobado: float | None = None
+    por_status: dict[str, int] | None = None
+    por_dia: list[StatsGrupo] | None = None
+    por_description: list[StatsGrupo] | None = None
+
+_stats_cache: dict = {}
+_stats_lock = threading.Lock()
+
+def _stats_grupo(acc: dict, clave: str, cantidad: int, monto: float, chances: int, aprobado: bool):
+    g = acc.setdefault(clave, {"clave": clave, "pagos": 0, "aprobados": 0, "monto_aprobado": 0.0, "chances": 0})
+    g["pagos"] += cantidad
+    if aprobado:
+        g["aprobados"] += cantidad
+        g["monto_aprobado"] += monto
+        g["chances"] += chances
+
+def _calcular_stats(desde: str | None, hasta: str | None, description: str | None):
+    sql = "SELECT dia, description, status, cantidad, monto, chances FROM pagos_rollup WHERE cantidad != 0"
+    params = []
+    if desde:
+        sql += " AND dia >= ?"
+        params.append(desde)
+    if hasta:
+        sql += " AND dia <= ?"
+        params.append(hasta)
+    if description is not None:
+        sql += " AND description = ?"
+        params.append(description)
+    with db() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    por_status, por_dia, por_desc = {}, {}, {}
+    monto_total = 0.0
+    for r in rows:
+        aprobado = r["status"] == "approved"
+        por_status[r["status"]] = por_status.get(r["status"], 0) + r["cantidad"]
+        monto_total += r["monto"]
+        _stats_grupo(por_dia, r["dia"], r["cantidad"], r["monto"], r["chances"], aprobado)
+        _stats_grupo(por_desc, r["description"], r["cantidad"], r["monto"], r["chances"], aprobado)
+
+    pagos = sum(por_status.values())
+    aprobados = por_status.get("approved", 0)
+    return StatsResponse(
+        desde=desde,
+        hasta=hasta,
+        pagos=pagos,
+        aprobados=aprobados,
+        tasa_aprobacion=round(aprobados / pagos, 4) if pagos else None,
+        monto_total=round(monto_total, 2),
+        monto_aprobado=round(sum(g["monto_aprobado"] for g in por_dia.values()), 2),
+        chances_vendidas=sum(g["chances"] for g in por_dia.values()),
+        por_status=por_status,
+        por_dia=[StatsGrupo(**g) for _, g in sorted(por_dia.items())],
+        por_description=sorted((StatsGrupo(**g) for g in por_desc.values()), key=lambda g: -g.pagos),
+    )
+
+def _autorizado(authorization: str | None, esperado: str | None) -> bool:
+    if not esperado or not authorization:
+        return False
+    esquema, _, token = authorization.partition(" ")
+    return esquema.lower() == "bearer" and hmac.compare_digest(token.strip(), esperado)
+
+def _stats_publicas(resp: StatsResponse) -> StatsResponse:
+    # el sitio muestra el contador de chances; montos y desgloses quedan para el panel interno
+    return StatsResponse(desde=resp.desde, hasta=resp.hasta, chances_vendidas=resp.chances_vendidas)
+
+@app.get("/stats", response_model=StatsResponse)
+def stats(
+    desde: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    hasta: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    description: str | None = Query(None, max_length=200),
+    authorization: str | None = Header(None),
+):
+    # lee sólo pagos_rollup (mantenida por sync_mp.upsert_pago), nunca escanea pagos
+    completo = _autorizado(authorization, STATS_API_TOKEN)
+    try:
+        key = (_snapshot_id(), desde, hasta, description)
+    except OSError as e:
+        return JSONResponse(status_code=503, content={"mensaje": f"Base no disponible: {e}"})
+    now = time.monotonic()
+    with _stats_lock:
+        hit = _stats_cache.get(key)
+    if hit and now - hit[0] < STATS_TTL:
+        return hit[1] if completo else _stats_publicas(hit[1])
+
+    try:
+        resp = _calcular_stats(desde, hasta, description)
+    except sqlite3.OperationalError:
+        return JSONResponse(status_code=503, content={"mensaje": "Estadísticas no disponibles; corré sync_mp.py para crear pagos_rollup."})
+    with _stats_lock:
+        if len(_stats_cache) > 256:
+            _stats_cache.clear()
+        _stats_cache[key] = (now, resp)
+    return resp if completo else _stats_publicas(resp)
+
+class BusquedaItem(BaseModel):
+    numero_operacion: str
+    status: str | None = None
+    fecha: str | None = None
+    monto: float | None = None
+    payer_name: str | None = None
+    payer_email: str | None = None
+    description: str | None = None
+    archivado: bool = False
+
+class BusquedaResponse(BaseModel):
+    resultados: list[BusquedaItem]
+    siguiente: int | None = None
+
+def _fts_query(q: str) -> str | None:
+    # cada palabra como prefijo ("juan per" -> "juan"* "per"*), todas obligatorias.
+    # Las de una letra se ignoran: los índices de prefijo son de 2 a 4 caracteres y
+    # "a"* recorrería todos los términos que empiezan con a.
+    palabras = [w for w in re.findall(r"\w+", q) if len(w) >= 2]
+    return " ".join(f'"{w}"*' for w in palabras) if palabras else None
+
+@app.get("/buscar", response_model=BusquedaResponse)
+def buscar(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    antes_de: int | None = Query(None, description="Cursor: valor de 'siguiente' de la página anterior"),
+    authorization: str | None = Header(None),
+):
+    # búsqueda de soporte por nombre, email o description; más nuevos primero
+    if not _autorizado(authorization, SUPPORT_API_TOKEN):
+        return JSONResponse(status_code=401, content={"mensaje": "No autorizado"})
+    match = _fts_query(q)
+    if not match:
+        return BusquedaResponse(resultados=[])
+
+    sql = "SELECT rowid FROM {schema}.pagos_fts WHERE pagos_fts MATCH ?"
+    params: list = [match]
+    if antes_de is not None:
+        sql += " AND rowid < ?"
+        params.append(antes_de)
+    sql += " ORDER BY rowid DESC LIMIT ?"
+    params.append(limit + 1)
+
+    try:
+        with db() as conn:
+            # la base de archivo tiene su propio pagos_fts (scripts/archivar_mp.py)
+            esquemas = [s for s in _local.verify_hints if conn.execute(
+                f"SELECT 1 FROM {s}.sqlite_master WHERE type='table' AND name='pagos_fts'").fetchone()]
+            ids = sorted({r[0] for s in esquemas for r in conn.execute(sql.format(schema=s), params)},
+                         reverse=True)[:limit + 1]
+            pagina = ids[:limit]
+            marks = ",".join("?" * len(pagina))
+            cols = "payment_id, numero_operacion, status, date_created, amount, payer_name, payer_email, description"
+            filas = {r["payment_id"]: (r, False) for r in conn.execute(
+                f"SELECT {cols} FROM main.pagos WHERE payment_id IN ({marks})", pagina)}
+            faltan = [i for i in pagina if i not in filas]
+            if faltan and "archivo" in _local.verify_hints:
+                filas.update({r["payment_id"]: (r, True) for r in conn.execute(
+                    f"SELECT {cols} FROM archivo.pagos WHERE payment_id IN ({','.join('?' * len(faltan))})", faltan)})
+    except sqlite3.OperationalError:
+        return JSONResponse(status_code=503, content={"mensaje": "Búsqueda no disponible; corré sync_mp.py para crear pagos_fts."})
+
+    resultados = []
+    for i in pagina:
+        if i not in filas:
+            continue
+        r, archivado = filas[i]
+        resultados.append(BusquedaItem(
+            numero_operacion=r["numero_operacion"],
+            status=r["status"],
+            fecha=r["date_created"],
+            monto=float(r["amount"]) if r["amount"] is not None else None,
+            payer_name=enmascarar(r["payer_name"]),
+            payer_email=enmascarar_email(r["payer_email"]),
+            description=r["description"],
+            archivado=archivado,
+        ))
+    return BusquedaResponse(resultados=resultados, siguiente=pagina[-1] if len(ids) > limit else None)
@@ -0,0 +1,119 @@
+"""Benchmark de throughput de api.py en modo multi-worker.
+
+Levanta `serve.py --workers N` (uvicorn con TCP_NODELAY) sobre un snapshot sintético, espera a
+/ready, carga /verificar desde varios procesos cliente y, a mitad de la corrida,
+publica un snapshot nuevo para comprobar que los workers lo toman sin errores.
+
+    python benchmarks/bench_api.py --pagos 200000 --workers 4 --clientes 8 --segundos 15
+"""
+import argparse, http.client, json, multiprocessing as mp, os, random, socket, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from synthetic_db import build_db  # noqa: E402
+from sync_mp import publish_snapshot  # noqa: E402
+
+APP_DIR = Path(__file__).resolve().parents[1]
+PRIMER_OP = 130_000_000_000
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _esperar_ready(port, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            c.request("GET", "/ready")
+            if c.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("[bench] La API no quedó lista a tiempo.")
+
+def _cliente(args):
+    port, pagos, segundos, seed = args
+    rnd = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    latencias, errores = [], 0
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        op = PRIMER_OP + rnd.randrange(pagos)
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", f"/verificar?op={op}")
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errores += 1
+        except OSError:
+            errores += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencias.append(time.perf_counter() - t0)
+    return latencias, errores
+
+def main(pagos: int, workers: int, clientes: int, segundos: float, objetivo: float | None, sin_nodelay: bool = False):
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "pagos_snapshot.db"
+        live = build_db(Path(tmp) / "pagos.db", pagos)
+        publish_snapshot(live, snapshot)
+
+        port = _puerto_libre()
+        # todos los clientes salen de 127.0.0.1: el rate limit por IP se desactiva para medir throughput
+        env = {**os.environ, "PAGOS_DB": str(snapshot), "VERIFY_RATE": "1e9", "VERIFY_BURST": "1e9"}
+        cmd = [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)]
+        if sin_nodelay:
+            cmd = [sys.executable, "-m", "uvicorn", "api:app", "--workers", str(workers),
+                   "--port", str(port), "--log-level", "warning", "--no-access-log"]
+        server = subprocess.Popen(cmd, cwd=APP_DIR, env=env)
+        try:
+            _esperar_ready(port)
+            with mp.Pool(clientes) as pool:
+                res = pool.map_async(_cliente, [(port, pagos, segundos, i) for i in range(clientes)])
+                # publica un snapshot nuevo a mitad de la carga (reload en caliente)
+                time.sleep(segundos / 2)
+                nuevo_op = str(PRIMER_OP + pagos)
+                with live:
+                    live.execute("""
+                      INSERT INTO pagos (payment_id, numero_operacion, status, amount, source)
+                      VALUES (?, ?, 'approved', 1999.0, 'bench')
+                    """, (int(nuevo_op), nuevo_op))
+                publish_snapshot(live, snapshot)
+                resultados = res.get()
+
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            c.request("GET", f"/verificar?op={nuevo_op}")
+            reload_ok = json.loads(c.getresponse().read()).get("verified") is True
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            live.close()
+
+    latencias = sorted(l for lat, _ in resultados for l in lat)
+    errores = sum(e for _, e in resultados)
+    rps = len(latencias) / segundos
+    p = lambda q: latencias[min(len(latencias) - 1, int(q * len(latencias)))] * 1000
+    modo = "uvicorn --workers (sin TCP_NODELAY)" if sin_nodelay else "serve.py"
+    print(f"[bench] {modo}: {workers} workers, {clientes} clientes, {segundos:.0f}s sobre {pagos} pagos")
+    print(f"[bench] {rps:.0f} req/s | p50 {p(0.50):.1f} ms | p99 {p(0.99):.1f} ms | errores {errores}")
+    print(f"[bench] snapshot nuevo visible tras el reload: {'sí' if reload_ok else 'NO'}")
+    ok = errores == 0 and reload_ok and (objetivo is None or rps >= objetivo)
+    if objetivo is not None:
+        print(f"[bench] objetivo {objetivo:.0f} req/s: {'OK' if rps >= objetivo else 'NO ALCANZADO'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pagos", type=int, default=200_000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--clientes", type=int, default=8, help="Procesos cliente concurrentes")
+    ap.add_argument("--segundos", type=float, default=15)
+    ap.add_argument("--objetivo", type=float, help="Throughput mínimo esperado (req/s); sale con 1 si no se alcanza")
+    ap.add_argument("--sin-nodelay", action="store_true", help="Usa `uvicorn --workers` directo para comparar con serve.py")
+    args = ap.parse_args()
+    raise SystemExit(main(args.pagos, args.workers, args.clientes, args.segundos, args.objetivo, args.sin_nodelay))
@@ -0,0 +1,38 @@
+"""Benchmark de la búsqueda FTS5 de soporte (GET /buscar) contra LIKE '%...%'.
+
+    python benchmarks/bench_busqueda.py --pagos 1000000
+"""
+import argparse, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from synthetic_db import build_db  # noqa: E402
+
+TERMINOS = ["gomez", "nuñez", "user12345", "luc", "semanera"]
+
+def main(pagos: int, limit: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(Path(tmp) / "pagos.db", pagos)
+        for termino in TERMINOS:
+            t0 = time.perf_counter()
+            fts = conn.execute("""
+              SELECT rowid FROM pagos_fts WHERE pagos_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            """, (f'"{termino}"*', limit)).fetchall()
+            t_fts = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            like = conn.execute("""
+              SELECT payment_id FROM pagos
+              WHERE payer_name LIKE ?1 OR payer_email LIKE ?1 OR description LIKE ?1
+              ORDER BY payment_id DESC LIMIT ?2
+            """, (f"%{termino}%", limit)).fetchall()
+            t_like = time.perf_counter() - t0
+            print(f"[bench] {termino!r:12} FTS {t_fts * 1000:7.1f} ms ({len(fts)}) | LIKE {t_like * 1000:8.1f} ms ({len(like)})")
+        conn.close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pagos", type=int, default=1_000_000)
+    ap.add_argument("--limit", type=int, default=20, help="Tamaño de página")
+    args = ap.parse_args()
+    main(args.pagos, args.limit)
@@ -0,0 +1,102 @@
+"""Benchmark de la consulta de /verificar antes y después de la migración 3 (índice de cobertura).
+
+Arma una base sintética en versión 2, la copia y migra la copia, así las dos
+variantes quedan en archivos separados. Tras una pasada de calentamiento de
+cada una, mide varias rondas alternando el orden (antes/después, después/antes)
+y reporta la mediana. Con --frio descarta del page cache del SO el archivo a
+medir antes de cada pasada (posix_fadvise) y no calienta.
+
+    python benchmarks/bench_indice_verificar.py --pagos 1000000 --consultas 50000 --rondas 7
+"""
+import argparse, os, random, shutil, sqlite3, statistics, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from synthetic_db import build_db  # noqa: E402
+from sync_mp import ensure_schema, VERIFY_INDEX  # noqa: E402
+
+PRIMER_OP = 130_000_000_000
+SQL = """
+  SELECT numero_operacion, status, amount, currency, date_approved, payer_name, description
+  FROM pagos {hint} WHERE numero_operacion = ?
+"""
+
+def descartar_cache(path):
+    # páginas limpias: el kernel las suelta sin necesidad de root
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def medir(path, ops, hint, cache_kib, frio=False):
+    """Segundos para resolver ops con una conexión nueva; devuelve (segundos, plan)."""
+    if frio:
+        descartar_cache(path)
+    # caché de SQLite chica: cada consulta depende de cuántas páginas toca
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.execute(f"PRAGMA cache_size=-{cache_kib}")
+    sql = SQL.format(hint=hint)
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, (ops[0],)).fetchone()[3]
+    t0 = time.perf_counter()
+    for op in ops:
+        conn.execute(sql, (op,)).fetchone()
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed, plan
+
+def main(pagos: int, consultas: int, cache_kib: int, rondas: int, frio: bool):
+    rnd = random.Random(7)
+    ops = [str(PRIMER_OP + rnd.randrange(pagos)) for _ in range(consultas)]
+    with tempfile.TemporaryDirectory() as tmp:
+        antes_db = Path(tmp) / "pagos_v2.db"
+        despues_db = Path(tmp) / "pagos.db"
+        t0 = time.perf_counter()
+        conn = build_db(antes_db, pagos, version=2)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        print(f"[bench] DB sintética (versión 2): {pagos} pagos en {time.perf_counter() - t0:.1f}s, {antes_db.stat().st_size / 2**20:.0f} MiB")
+
+        shutil.copyfile(antes_db, despues_db)
+        conn = sqlite3.connect(despues_db)
+        t0 = time.perf_counter()
+        ensure_schema(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        print(f"[bench] migración 3 en {time.perf_counter() - t0:.1f}s, {despues_db.stat().st_size / 2**20:.0f} MiB")
+
+        variantes = {
+            "antes": (antes_db, ""),
+            "después": (despues_db, f"INDEXED BY {VERIFY_INDEX}"),
+        }
+        planes = {}
+        if not frio:
+            for nombre, (path, hint) in variantes.items():
+                _, planes[nombre] = medir(path, ops, hint, cache_kib)
+        tiempos = {nombre: [] for nombre in variantes}
+        for ronda in range(rondas):
+            orden = list(variantes) if ronda % 2 == 0 else list(reversed(variantes))
+            for nombre in orden:
+                path, hint = variantes[nombre]
+                segundos, planes[nombre] = medir(path, ops, hint, cache_kib, frio)
+                tiempos[nombre].append(segundos)
+
+    modo = "caché fría" if frio else "caché caliente"
+    print(f"[bench] {rondas} rondas alternadas de {consultas} consultas, {modo}:")
+    for nombre, ts in tiempos.items():
+        qps = sorted(consultas / t for t in ts)
+        print(f"[bench] {nombre + ':':9} mediana {statistics.median(qps):,.0f} consultas/s "
+              f"(mín {qps[0]:,.0f}, máx {qps[-1]:,.0f})  ({planes[nombre]})")
+    mejora = statistics.median(tiempos["antes"]) / statistics.median(tiempos["después"])
+    por_ronda = sorted(a / d for a, d in zip(tiempos["antes"], tiempos["después"]))
+    print(f"[bench] mejora (medianas): x{mejora:.2f} | por ronda: x{por_ronda[0]:.2f}–x{por_ronda[-1]:.2f}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pagos", type=int, default=1_000_000)
+    ap.add_argument("--consultas", type=int, default=50_000)
+    ap.add_argument("--cache-kib", type=int, default=2048, help="cache_size de SQLite por conexión (KiB)")
+    ap.add_argument("--rondas", type=int, default=7, help="Rondas alternadas por variante (se reporta la mediana)")
+    ap.add_argument("--frio", action="store_true", help="Descarta el archivo del page cache antes de cada pasada")
+    args = ap.parse_args()
+    main(args.pagos, args.consultas, args.cache_kib, args.rondas, args.frio)
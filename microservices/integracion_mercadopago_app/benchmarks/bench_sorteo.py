@@ -0,0 +1,40 @@
+"""Benchmark del sorteo sobre rifas sintéticas de millones de chances.
+
+    python benchmarks/bench_sorteo.py --pagos 200000 --ganadores 5
+"""
+import argparse, sys, tempfile, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from synthetic_db import build_db  # noqa: E402
+from sortear_mp import sortear, iter_participantes  # noqa: E402
+
+def main(pagos: int, ganadores: int, raw_bytes: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        conn = build_db(Path(tmp) / "pagos.db", pagos, raw_bytes=raw_bytes)
+        print(f"[bench] DB sintética: {pagos} pagos en {time.perf_counter() - t0:.1f}s")
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        result, total_pagos, total_chances, _ = sortear(iter_participantes(conn), "bench-seed", ganadores)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        again, _, _, _ = sortear(iter_participantes(conn), "bench-seed", ganadores)
+        conn.close()
+
+    print(f"[bench] {total_pagos} pagos aprobados, {total_chances} chances")
+    print(f"[bench] sorteo: {elapsed:.2f}s ({total_pagos / elapsed / 1e3:.0f}k pagos/s), pico de memoria {peak / 1024:.0f} KiB")
+    print(f"[bench] reproducible: {'sí' if again == result else 'NO'}")
+    for g in result:
+        print(f"[bench] {g['puesto']}° {g['ticket']} ({g['chances']} chances)")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pagos", type=int, default=200_000, help="Pagos sintéticos (≈1.5M chances con 200k)")
+    ap.add_argument("--ganadores", type=int, default=5)
+    ap.add_argument("--raw-bytes", type=int, default=2000, help="Tamaño aproximado de la columna raw")
+    args = ap.parse_args()
+    main(args.pagos, args.ganadores, args.raw_bytes)
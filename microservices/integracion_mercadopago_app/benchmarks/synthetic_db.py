@@ -0,0 +1,56 @@
+"""Genera un pagos.db sintético con el esquema de sync_mp.py para los benchmarks."""
+import json, random, sqlite3, sys, datetime as dt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from sync_mp import ensure_schema, rebuild_fts, rebuild_rollup, schema_version  # noqa: E402
+
+PROMOS = [
+    ("🍀 La chance de la suerte – 1 chance - Sorteo Honda", 1999.0, 50),
+    ("🎯 Triplete ganador – 3 chances - Sorteo Honda", 4999.0, 25),
+    ("🗓️ La semanera – 7 chances - Sorteo Honda", 8999.0, 15),
+    ("🔥 Veinte ganador – 20 chances - Sorteo Honda", 17999.0, 7),
+    ("💥 La mega chance – 70 chances - Sorteo Honda", 29999.0, 3),
+]
+STATUSES = ["approved"] * 18 + ["pending", "rejected"]
+NOMBRES = ["Mariana", "Luis", "Carolina", "José", "Martín", "Lucía", "Ramón", "Sofía"]
+APELLIDOS = ["Gómez", "Martínez", "Pérez", "Núñez", "Fernández", "Ojeda", "Sánchez"]
+
+def rows(n, seed=1234, raw_bytes=2000, start=dt.datetime(2025, 10, 1)):
+    rnd = random.Random(seed)
+    weights = [p[2] for p in PROMOS]
+    padding = "x" * raw_bytes
+    for i in range(n):
+        desc, amount, _ = rnd.choices(PROMOS, weights)[0]
+        created = start + dt.timedelta(seconds=i * 30)
+        status = rnd.choice(STATUSES)
+        pid = 130_000_000_000 + i
+        nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}"
+        iso = created.strftime("%Y-%m-%dT%H:%M:%S.000-03:00")
+        yield (
+            pid, str(pid), None, desc, status, "accredited", amount, "ARS",
+            f"user{i}@example.com", nombre, "account_money",
+            iso, iso if status == "approved" else None, None, None, "api",
+            json.dumps({"id": pid, "description": desc, "padding": padding}, ensure_ascii=False),
+        )
+
+def build_db(path, n, version=None, **kw):
+    """Crea la base con las migraciones hasta `version` (todas por defecto) y n pagos."""
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(path)
+    ensure_schema(conn, hasta=version)
+    with conn:
+        conn.executemany("""
+          INSERT INTO pagos (
+            payment_id, numero_operacion, external_reference, description, status, status_detail,
+            amount, currency, payer_email, payer_name, payment_method_id,
+            date_created, date_approved, receipt_url, detalle_url, source, raw
+          ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+        """, rows(n, **kw))
+        if schema_version(conn) >= 2:
+            rebuild_rollup(conn)
+        if schema_version(conn) >= 4:
+            rebuild_fts(conn)
+    return conn
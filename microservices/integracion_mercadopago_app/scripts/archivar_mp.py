@@ -0,0 +1,111 @@
+import os, sqlite3, argparse, datetime as dt
+
+from sync_mp import DB_PATH, ARCHIVE_PATH, FTS_DDL, open_db, ensure_schema, attach_archive, publish_snapshot_if_changed
+
+# Pagos con date_created anterior a este horizonte (en días) se mueven al archivo
+ARCHIVE_DAYS = int(os.getenv("ARCHIVE_DAYS", "180"))
+BATCH = 5000
+
+def ensure_archive_schema(conn, path=ARCHIVE_PATH):
+    """Crea la base de archivo con la misma tabla pagos que la base caliente y su pagos_fts.
+
+    Devuelve True si recién se creó pagos_fts en el archivo (archivos de antes de tenerla).
+    """
+    ddl = conn.execute("SELECT sql FROM main.sqlite_master WHERE type='table' AND name='pagos'").fetchone()[0]
+    arch = sqlite3.connect(path)
+    try:
+        if not arch.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='pagos'").fetchone():
+            arch.execute(ddl)
+            arch.execute("CREATE INDEX IF NOT EXISTS idx_pagos_date_created ON pagos (date_created)")
+        nueva_fts = not arch.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='pagos_fts'").fetchone()
+        if nueva_fts:
+            arch.execute(FTS_DDL)
+            arch.execute("""
+              INSERT INTO pagos_fts (rowid, payer_name, payer_email, description)
+              SELECT payment_id, payer_name, payer_email, description FROM pagos
+            """)
+        arch.commit()
+    finally:
+        arch.close()
+    return nueva_fts
+
+def purgar_fts_archivados(conn):
+    """Borra de main.pagos_fts las entradas de pagos que ya sólo están en el archivo."""
+    with conn:
+        conn.execute("""
+          DELETE FROM main.pagos_fts WHERE rowid IN (
+            SELECT payment_id FROM archivo.pagos WHERE payment_id NOT IN (SELECT payment_id FROM main.pagos)
+          )
+        """)
+    print("[archivo] Búsqueda de los pagos ya archivados movida al pagos_fts del archivo.")
+
+def _columnas(conn, schema):
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info(pagos)")]
+
+def archivar(conn, corte: str, batch: int = BATCH):
+    """Mueve a archivo.pagos los pagos con date_created < corte, en lotes. Devuelve cuántos movió."""
+    # mismas columnas en el mismo orden aunque la base caliente haya sumado columnas nuevas
+    arch_cols = set(_columnas(conn, "archivo"))
+    for col in _columnas(conn, "main"):
+        if col not in arch_cols:
+            conn.execute(f"ALTER TABLE archivo.pagos ADD COLUMN {col}")
+    cols = ", ".join(_columnas(conn, "main"))
+
+    # Con la base caliente en WAL SQLite no hace atómico un commit que toca las dos bases
+    # (confirma main y después el archivo), así que cada lote son dos transacciones de un
+    # solo archivo: primero se copia y se confirma en el archivo, y recién entonces se borra
+    # de la base caliente lo que ya está allá. Si se corta en el medio el lote queda en las
+    # dos bases; re-ejecutar es seguro (INSERT OR REPLACE) y las lecturas prefieren main.
+    movidos = 0
+    while True:
+        ids = [r[0] for r in conn.execute(
+            "SELECT payment_id FROM main.pagos WHERE date_created < ? LIMIT ?", (corte, batch))]
+        if not ids:
+            break
+        marks = ",".join("?" * len(ids))
+        with conn:
+            conn.execute(f"INSERT OR REPLACE INTO archivo.pagos ({cols}) SELECT {cols} FROM main.pagos WHERE payment_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM archivo.pagos_fts WHERE rowid IN ({marks})", ids)
+            conn.execute(f"""
+              INSERT INTO archivo.pagos_fts (rowid, payer_name, payer_email, description)
+              SELECT payment_id, payer_name, payer_email, description FROM main.pagos WHERE payment_id IN ({marks})
+            """, ids)
+        copiados = conn.execute(f"SELECT COUNT(*) FROM archivo.pagos WHERE payment_id IN ({marks})", ids).fetchone()[0]
+        if copiados != len(ids):
+            raise SystemExit(f"[archivo] Sólo {copiados} de {len(ids)} pagos quedaron en el archivo; no se borra nada de la base caliente.")
+        with conn:
+            conn.execute(f"DELETE FROM main.pagos WHERE payment_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM main.pagos_fts WHERE rowid IN ({marks})", ids)
+        movidos += len(ids)
+        print(f"[archivo] {movidos} pagos movidos...")
+    return movidos
+
+def main(dias: int, vacuum: bool):
+    conn = open_db()
+    ensure_schema(conn)
+    nueva_fts = ensure_archive_schema(conn)
+    attach_archive(conn)
+    if nueva_fts:
+        # archivos de antes de tener pagos_fts: sus pagos seguían indexados en la base caliente
+        purgar_fts_archivados(conn)
+
+    corte = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=dias)).strftime("%Y-%m-%d")
+    print(f"[archivo] Moviendo pagos creados antes de {corte} a {ARCHIVE_PATH.resolve()}")
+    movidos = archivar(conn, corte)
+    conn.execute("DETACH DATABASE archivo")
+
+    # pagos_rollup no se toca: las estadísticas siguen contando los pagos archivados
+    if movidos and vacuum:
+        print("[archivo] VACUUM de la base caliente...")
+        conn.execute("VACUUM")
+    # el snapshot viejo todavía tiene los pagos movidos; la API debe ver la base achicada
+    publish_snapshot_if_changed(conn)
+    conn.close()
+    print(f"[archivo] Listo. Pagos archivados: {movidos}. DB: {DB_PATH.resolve()}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mueve los pagos viejos de pagos.db a la base de archivo.")
+    ap.add_argument("--dias", type=int, default=ARCHIVE_DAYS, help=f"Horizonte en días (por defecto $ARCHIVE_DAYS o {ARCHIVE_DAYS})")
+    ap.add_argument("--sin-vacuum", action="store_true", help="No compactar la base caliente al terminar.")
+    args = ap.parse_args()
+    main(args.dias, not args.sin_vacuum)
@@ -0,0 +1,145 @@
+import csv, sqlite3, argparse
+from collections import Counter
+
+from sync_mp import DB_PATH, open_db, ensure_schema, attach_archive, publish_snapshot_if_changed
+
+# Estado del comprobante ("Cobro aprobado") -> status posibles del pago en la API
+ESTADOS = {
+    "aprobado": {"approved"},
+    "pendiente": {"pending", "in_process", "authorized"},
+    "rechazado": {"rejected", "cancelled"},
+}
+TOLERANCIA_MONTO = 0.01
+BATCH = 500
+
+def _estado_comprobante(estado):
+    if not estado:
+        return None
+    return estado.strip().split()[-1].lower()
+
+def comparar(comp, pago):
+    """(resultado, detalle) para un comprobante y su pago (o None).
+
+    Si hay más de una diferencia el resultado es la más grave (el estado antes que
+    el monto) y el detalle las enumera todas.
+    """
+    if not comp["numero_operacion"]:
+        return "sin_numero", "El OCR no encontró el número de operación."
+    if pago is None:
+        return "sin_pago", "No hay un pago sincronizado con ese número de operación."
+    problemas = []
+    estado = _estado_comprobante(comp["estado"])
+    if estado in ESTADOS and pago["status"] not in ESTADOS[estado]:
+        problemas.append(("estado_distinto", f"estado: comprobante '{comp['estado']}' / pago '{pago['status']}'"))
+    if comp["monto_bruto"] is not None and pago["amount"] is not None \
+            and abs(comp["monto_bruto"] - pago["amount"]) > TOLERANCIA_MONTO:
+        problemas.append(("monto_distinto", f"monto: comprobante {comp['monto_bruto']:.2f} / pago {pago['amount']:.2f}"))
+    if not problemas:
+        return "ok", None
+    return problemas[0][0], "; ".join(d for _, d in problemas)
+
+def marcar_pagos_cambiados(conn):
+    """Vuelve a dejar pendientes los comprobantes cuyo pago cambió desde la última corrida.
+
+    Devuelve la marca (MAX(updated_at) de pagos) a guardar al terminar.
+    """
+    desde = conn.execute("SELECT ultimo_pago_updated_at FROM conciliacion_estado WHERE id=1").fetchone()[0]
+    hasta = conn.execute("SELECT MAX(updated_at) FROM pagos").fetchone()[0]
+    if desde is not None:
+        # >= : un pago actualizado en el mismo segundo que la marca se revisa de nuevo (es idempotente)
+        with conn:
+            n = conn.execute("""
+              UPDATE comprobantes SET conciliado = 0
+              WHERE conciliado = 1 AND numero_operacion IN (
+                SELECT numero_operacion FROM pagos WHERE updated_at >= ?
+              )
+            """, (desde,)).rowcount
+        if n:
+            print(f"[conciliar] {n} comprobantes a revisar por pagos actualizados desde {desde}.")
+    return hasta
+
+def _buscar_pago(conn, numero_operacion, archivo):
+    pago = conn.execute("SELECT status, amount FROM main.pagos WHERE numero_operacion = ?", (numero_operacion,)).fetchone()
+    if pago is None and archivo:
+        pago = conn.execute("SELECT status, amount FROM archivo.pagos WHERE numero_operacion = ?", (numero_operacion,)).fetchone()
+    return pago
+
+def conciliar(conn, archivo=False):
+    """Concilia sólo los comprobantes pendientes, en lotes; devuelve un Counter por resultado."""
+    hasta = marcar_pagos_cambiados(conn)
+    resumen = Counter()
+    ultimo = ""
+    while True:
+        lote = conn.execute("""
+          SELECT file_hash, file, numero_operacion, monto_bruto, estado
+          FROM comprobantes WHERE conciliado = 0 AND file_hash > ?
+          ORDER BY file_hash LIMIT ?
+        """, (ultimo, BATCH)).fetchall()
+        if not lote:
+            break
+        with conn:
+            for comp in lote:
+                pago = _buscar_pago(conn, comp["numero_operacion"], archivo) if comp["numero_operacion"] else None
+                resultado, detalle = comparar(comp, pago)
+                conn.execute("""
+                  INSERT INTO conciliacion (file_hash, numero_operacion, resultado, detalle, revisado_at)
+                  VALUES (?,?,?,?, datetime('now'))
+                  ON CONFLICT(file_hash) DO UPDATE SET
+                    numero_operacion=excluded.numero_operacion,
+                    resultado=excluded.resultado,
+                    detalle=excluded.detalle,
+                    revisado_at=excluded.revisado_at
+                """, (comp["file_hash"], comp["numero_operacion"], resultado, detalle))
+                conn.execute("UPDATE comprobantes SET conciliado = 1 WHERE file_hash = ?", (comp["file_hash"],))
+                resumen[resultado] += 1
+                if resultado != "ok":
+                    print(f"[conciliar] {resultado}: {comp['file']} (op {comp['numero_operacion'] or '-'}) {detalle}")
+        ultimo = lote[-1]["file_hash"]
+
+    with conn:
+        conn.execute("UPDATE conciliacion_estado SET ultimo_pago_updated_at = ? WHERE id=1", (hasta,))
+    return resumen
+
+def exportar_diferencias(conn, path):
+    """Escribe en CSV todas las diferencias vigentes, fila por fila."""
+    cur = conn.execute("""
+      SELECT k.resultado, k.numero_operacion, c.file, c.monto_bruto, c.estado, k.detalle, k.revisado_at
+      FROM conciliacion k JOIN comprobantes c ON c.file_hash = k.file_hash
+      WHERE k.resultado != 'ok'
+      ORDER BY k.resultado, k.numero_operacion
+    """)
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as fh:
+        w = csv.writer(fh)
+        w.writerow([d[0] for d in cur.description])
+        for row in cur:
+            w.writerow(row)
+            n += 1
+    return n
+
+def main(reporte: str | None):
+    conn = open_db()
+    ensure_schema(conn)
+    conn.row_factory = sqlite3.Row
+    archivo = attach_archive(conn)
+
+    resumen = conciliar(conn, archivo)
+    total = sum(resumen.values())
+    if not total:
+        print("[conciliar] No hay comprobantes nuevos ni pagos actualizados para revisar.")
+    else:
+        detalle = ", ".join(f"{k}: {v}" for k, v in sorted(resumen.items()))
+        print(f"[conciliar] Revisados: {total} ({detalle})")
+
+    if reporte:
+        n = exportar_diferencias(conn, reporte)
+        print(f"[conciliar] {n} diferencias vigentes exportadas a {reporte}")
+    publish_snapshot_if_changed(conn)
+    conn.close()
+    print(f"[conciliar] DB: {DB_PATH.resolve()}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Concilia los comprobantes guardados contra los pagos sincronizados.")
+    ap.add_argument("--reporte", help="CSV donde exportar todas las diferencias vigentes.")
+    args = ap.parse_args()
+    main(args.reporte)
@@ -2,8 +2,11 @@ from pdf2image import convert_from_path
 import pytesseract
 import re
 import os
+import hashlib
+import argparse
 import pandas as pd
-import sqlite3
+
+from sync_mp import open_db, ensure_schema, publish_snapshot_if_changed
 
 # --- Configuración ---
 INPUT_DIR = r"C:\Users\El Pela Flow\OneDrive\Documentos\Lector comprobantes\comprobantes"
@@ -27,6 +30,71 @@ RE_CLIENTE = re.compile(r'Cliente\s+([A-Za-zÁÉÍÓÚÜÑ\s]+)', re.IGNORECASE)
 RE_EMAIL = re.compile(r'([\w\.-]+@[\w\.-]+\.\w+)', re.IGNORECASE)
 RE_LINK = re.compile(r'https://[^\s]+', re.IGNORECASE)
 
+# --- Helpers de persistencia ---
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def parse_monto(valor):
+    """'3.500,00' / '266,35' / '3.500' (formato AR) -> float."""
+    if not valor:
+        return None
+    v = valor.strip().rstrip(".,")
+    if "," in v:
+        v = v.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(\.\d{3})+", v):
+        v = v.replace(".", "")
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+def guardar_comprobante(conn, file_hash, row):
+    """Guarda (o actualiza) el comprobante parseado; queda pendiente de conciliar."""
+    cantidad = row["cantidad_productos"]
+    conn.execute("""
+      INSERT INTO comprobantes (
+        file_hash, file, numero_operacion, fecha_impresion, fecha_pago, monto_bruto, cargo_mp, monto_neto,
+        estado, medio_pago, cantidad_productos, cliente_nombre, cliente_email, link_detalle, texto_raw
+      ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+      ON CONFLICT(file_hash) DO UPDATE SET
+        file=excluded.file,
+        numero_operacion=excluded.numero_operacion,
+        fecha_impresion=excluded.fecha_impresion,
+        fecha_pago=excluded.fecha_pago,
+        monto_bruto=excluded.monto_bruto,
+        cargo_mp=excluded.cargo_mp,
+        monto_neto=excluded.monto_neto,
+        estado=excluded.estado,
+        medio_pago=excluded.medio_pago,
+        cantidad_productos=excluded.cantidad_productos,
+        cliente_nombre=excluded.cliente_nombre,
+        cliente_email=excluded.cliente_email,
+        link_detalle=excluded.link_detalle,
+        texto_raw=excluded.texto_raw,
+        conciliado=0,
+        procesado_at=datetime('now')
+    """, (
+        file_hash,
+        row["file"],
+        row["numero_operacion"],
+        row["fecha_impresion"],
+        row["fecha_pago"],
+        parse_monto(row["monto_bruto"]),
+        parse_monto(row["cargo_mp"]),
+        parse_monto(row["monto_neto"]),
+        row["estado"],
+        row["medio_pago"],
+        int(cantidad) if cantidad else None,
+        row["cliente_nombre"],
+        row["cliente_email"],
+        row["link_detalle"],
+        row["texto_raw"],
+    ))
+
 # --- Función de extracción de texto por OCR ---
 def ocr_pdf(pdf_path):
     images = convert_from_path(pdf_path, dpi=300)
@@ -84,40 +152,49 @@ def parse_comprobante_text(text, file_name):
     return row
 
 # --- Procesamiento principal ---
-def main():
+def main(input_dir=INPUT_DIR, reprocesar=False):
     # --- Conexión a la base de datos ---
-    conn = sqlite3.connect("pagos.db")
-    db_df = pd.read_sql_query("SELECT numero_operacion, description FROM pagos", conn)
-    conn.close()
+    conn = open_db()
+    ensure_schema(conn)
 
-    files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(".pdf")]
+    files = [f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")]
     rows = []
+    omitidos = 0
 
     for f in files:
-        path = os.path.join(INPUT_DIR, f)
+        path = os.path.join(input_dir, f)
+        file_hash = file_sha256(path)
+        # Ya leído en una corrida anterior: no se repite el OCR
+        if not reprocesar and conn.execute("SELECT 1 FROM comprobantes WHERE file_hash = ?", (file_hash,)).fetchone():
+            omitidos += 1
+            continue
         print(f"Procesando {f} ...")
         try:
             text = ocr_pdf(path)
             row = parse_comprobante_text(text, f)
+            with conn:
+                guardar_comprobante(conn, file_hash, row)
             rows.append(row)
         except Exception as e:
             print(f"⚠️ Error con {f}: {e}")
 
+    if omitidos:
+        print(f"{omitidos} comprobantes ya estaban en la base (usá --reprocesar para leerlos de nuevo).")
     if not rows:
-        print("No se encontraron comprobantes válidos.")
+        print("No se encontraron comprobantes nuevos.")
         return
 
+    # --- Descripción del pago (búsqueda por índice, sin leer toda la tabla) ---
+    for row in rows:
+        if row["numero_operacion"]:
+            pago = conn.execute("SELECT description FROM pagos WHERE numero_operacion = ?", (row["numero_operacion"],)).fetchone()
+            row["description"] = pago[0] if pago else None
+    publish_snapshot_if_changed(conn)
+    conn.close()
+
     # --- CSV completo ---
     df = pd.DataFrame(rows)
 
-    # --- Merge con datos de la DB ---
-    # Asegurarse que la columna de merge sea del mismo tipo
-    df['numero_operacion'] = df['numero_operacion'].astype(str)
-    db_df['numero_operacion'] = db_df['numero_operacion'].astype(str)
-    
-    # Merge para agregar la descripción
-    df = pd.merge(df, db_df, on="numero_operacion", how="left")
-
     df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
     print(f"\n✅ Listo. CSV guardado en: {OUTPUT_CSV}")
     print(f"Total comprobantes procesados: {len(rows)}")
@@ -141,4 +218,8 @@ def main():
     print(f"🧾 CSV limpio guardado en: {OUTPUT_CSV_LIMPIO}")
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Lee comprobantes PDF de Mercado Pago y los guarda en pagos.db (tabla comprobantes).")
+    ap.add_argument("--dir", default=INPUT_DIR, help="Carpeta con los PDF")
+    ap.add_argument("--reprocesar", action="store_true", help="Vuelve a leer también los PDF ya guardados.")
+    args = ap.parse_args()
+    main(args.dir, args.reprocesar)
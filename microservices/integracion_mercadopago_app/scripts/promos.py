@@ -0,0 +1,24 @@
+import re
+
+# Cantidad de chances según el título de la promo:
+#   "Triplete ganador – 3 chances" / "Promo para los primeros 10 - 3 x 1"
+RE_CHANCES = re.compile(r'(\d+)\s*chances?\b', re.IGNORECASE)
+RE_PROMO_X1 = re.compile(r'(\d+)\s*x\s*1\b', re.IGNORECASE)
+
+def chances_de(description):
+    """Chances (papelitos) que otorga un pago según la descripción de la promo."""
+    if not description:
+        return 1
+    for rx in (RE_CHANCES, RE_PROMO_X1):
+        if m := rx.search(description):
+            return max(1, int(m.group(1)))
+    return 1
+
+def enmascarar(nombre: str | None):
+    """Nombre público de un comprador: "Juan Pérez" -> "Juan P." (API y muro de ganadores)."""
+    if not nombre: return None
+    parts = nombre.strip().split()
+    if not parts: return None
+    if len(parts) >= 2:
+        return f"{parts[0]} {parts[1][0]}."
+    return parts[0]
@@ -5,6 +5,9 @@ from pathlib import Path
 # Localiza la base en el directorio del microservicio
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / 'pagos.db'
+# Pagos viejos movidos por archivar_mp.py ($PAGOS_ARCHIVE, relativo al microservicio);
+# sólo se consulta si el op no está en DB_PATH
+ARCHIVE_DB = BASE_DIR / os.getenv('PAGOS_ARCHIVE', 'pagos_archivo.db')
 
 # Para evitar errores de SQLite cuando intenta crear archivos -wal/-shm en un
 # directorio sin permisos de escritura (por ejemplo, bind-mounts de sólo lectura
@@ -54,13 +57,33 @@ def main():
             conn.row_factory = sqlite3.Row
             conn.execute("PRAGMA query_only = ON")
 
+        # Si la migración 3 de sync_mp.py creó el índice de cobertura, se fuerza su uso:
+        # SQLite elegiría el del UNIQUE y leería la fila completa con raw.
+        hint = "INDEXED BY idx_pagos_verificar" if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_pagos_verificar'"
+        ).fetchone() else ""
         row = conn.execute(
-            """
+            f"""
             SELECT numero_operacion, status, amount, currency, date_approved, payer_name, description
-            FROM pagos WHERE numero_operacion = ?
+            FROM pagos {hint} WHERE numero_operacion = ?
             """,
             (op,),
         ).fetchone()
+
+        if not row and ARCHIVE_DB.exists():
+            # El archivo no se copia al staging: se abre directo en sólo lectura
+            arch = sqlite3.connect(f"file:{ARCHIVE_DB}?mode=ro", uri=True)
+            arch.row_factory = sqlite3.Row
+            try:
+                row = arch.execute(
+                    """
+                    SELECT numero_operacion, status, amount, currency, date_approved, payer_name, description
+                    FROM pagos WHERE numero_operacion = ?
+                    """,
+                    (op,),
+                ).fetchone()
+            finally:
+                arch.close()
     except Exception as e:
         print(json.dumps({"ok": False, "error": f"Error DB: {e}"}, ensure_ascii=False))
         return 1
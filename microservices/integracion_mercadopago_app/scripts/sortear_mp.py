@@ -0,0 +1,200 @@
+import json, sqlite3, hashlib, heapq, html, math, argparse, datetime as dt
+from pathlib import Path
+
+from promos import chances_de, enmascarar
+from sync_mp import DB_PATH, open_db, ensure_schema, attach_archive, publish_snapshot_if_changed
+
+# Contenido del sitio (web/data/site-content.json) donde vive el muro de ganadores
+CONTENT_PATH = Path(__file__).resolve().parents[3] / "data" / "site-content.json"
+PAGINA_GANADORES = "ganadoresanteriores"
+
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+         "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+def _hash_unit(*parts):
+    """Número en (0, 1) derivado sólo de la semilla y el pago; no depende del orden de lectura."""
+    digest = hashlib.sha256(":".join(parts).encode("utf-8")).digest()
+    return (int.from_bytes(digest[:8], "big") + 0.5) / 2**64
+
+def _ticket(seed, numero_operacion, chances):
+    # El papelito ganador dentro del pago: 131036314838-1, -2, -3...
+    idx = int.from_bytes(hashlib.sha256(f"{seed}:{numero_operacion}:ticket".encode("utf-8")).digest()[:8], "big")
+    return f"{numero_operacion}-{idx % chances + 1}"
+
+def _where_participantes(filtro, corte):
+    sql = " WHERE status = 'approved'"
+    params = []
+    if filtro:
+        sql += " AND description LIKE ?"
+        params.append(filtro)
+    if corte:
+        sql += " AND date_approved <= ?"
+        params.append(corte)
+    return sql, params
+
+def _esquemas(conn):
+    # la base caliente y, si está adjunta, la de archivo (ver sync_mp.attach_archive)
+    return [name for _, name, _file in conn.execute("PRAGMA database_list") if name in ("main", "archivo")]
+
+def _sin_duplicados(schema):
+    # un pago en las dos bases (lote de archivar_mp.py a medio mover): manda la fila de main
+    return " AND payment_id NOT IN (SELECT payment_id FROM main.pagos)" if schema == "archivo" else ""
+
+def corte_actual(conn, filtro=None):
+    """Último date_approved que entra al sorteo; fija el conjunto de participantes."""
+    where, params = _where_participantes(filtro, None)
+    cortes = [conn.execute(f"SELECT MAX(date_approved) FROM {s}.pagos{where}{_sin_duplicados(s)}", params).fetchone()[0]
+              for s in _esquemas(conn)]
+    return max((c for c in cortes if c), default=None)
+
+def iter_participantes(conn, filtro=None, corte=None, despues_de=None):
+    """Recorre los pagos aprobados hasta `corte`, ordenados por payment_id, con un cursor.
+
+    Une la base caliente con el archivo (dos recorridos por rowid intercalados);
+    un pago que está en las dos (lote de archivar_mp.py a medio mover) se toma
+    de main, aunque allí ya no esté aprobado. El orden fijo es el que usa el hash de participantes. `despues_de` (un
+    payment_id) permite paginar el listado público.
+    """
+    where, params = _where_participantes(filtro, corte)
+    if despues_de is not None:
+        where += " AND payment_id > ?"
+        params.append(despues_de)
+    cursores = [conn.execute(
+        f"SELECT numero_operacion, payer_name, description, payment_id FROM {s}.pagos{where}{_sin_duplicados(s)} ORDER BY payment_id", params)
+        for s in _esquemas(conn)]
+    yield from heapq.merge(*cursores, key=lambda r: r[3])
+
+def sortear(participantes, seed: str, n: int):
+    """Elige n pagos distintos con probabilidad proporcional a sus chances.
+
+    Muestreo ponderado por reservorio (Efraimidis-Spirakis): cada pago recibe la
+    clave log(u)/chances con u derivado de sha256(seed:numero_operacion) y se
+    quedan las n claves más altas. Equivale a sacar papelitos de la urna de a uno
+    descartando los demás papelitos del pago que ya ganó. La memoria es O(n),
+    sin importar cuántos pagos o chances haya.
+
+    También devuelve el sha256 de la lista ordenada "numero_operacion:chances",
+    que identifica exactamente quiénes participaron.
+    """
+    heap = []
+    digest = hashlib.sha256()
+    total_pagos = 0
+    total_chances = 0
+    cache_chances = {}
+    for row in participantes:
+        op, payer_name, description = row[0], row[1], row[2]
+        w = cache_chances.get(description)
+        if w is None:
+            w = cache_chances[description] = chances_de(description)
+        total_pagos += 1
+        total_chances += w
+        digest.update(f"{op}:{w}\n".encode("utf-8"))
+        key = math.log(_hash_unit(seed, op)) / w
+        item = (key, op, payer_name, w)
+        if len(heap) < n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    ganadores = []
+    for puesto, (_key, op, payer_name, w) in enumerate(sorted(heap, reverse=True), start=1):
+        ganadores.append({
+            "puesto": puesto,
+            "numero_operacion": op,
+            "ticket": _ticket(seed, op, w),
+            "payer_name": payer_name,
+            "chances": w,
+        })
+    return ganadores, total_pagos, total_chances, digest.hexdigest()
+
+def guardar_sorteo(conn, seed, filtro, corte, premio, ganadores, total_pagos, total_chances, participantes_sha256):
+    with conn:
+        cur = conn.execute("""
+          INSERT INTO sorteos (seed, filtro, corte, premio, ganadores, participantes, chances, participantes_sha256)
+          VALUES (?,?,?,?,?,?,?,?)
+        """, (seed, filtro, corte, premio, len(ganadores), total_pagos, total_chances, participantes_sha256))
+        sorteo_id = cur.lastrowid
+        conn.executemany("""
+          INSERT INTO sorteo_ganadores (sorteo_id, puesto, numero_operacion, ticket, payer_name, chances)
+          VALUES (?,?,?,?,?,?)
+        """, [(sorteo_id, g["puesto"], g["numero_operacion"], g["ticket"], g["payer_name"], g["chances"])
+              for g in ganadores])
+    return sorteo_id
+
+def publicar_ganadores(sorteo_id, premio, ganadores, content_path=CONTENT_PATH):
+    """Agrega las tarjetas al muroGanadores de la página de ganadores anteriores."""
+    content = json.loads(content_path.read_text(encoding="utf-8"))
+    page = next((p for p in content.get("pages", []) if p.get("id") == PAGINA_GANADORES), None)
+    section = next((s for s in (page or {}).get("sections", []) if s.get("type") == "muroGanadores"), None)
+    if section is None:
+        raise SystemExit(f"No se encontró la sección muroGanadores en la página '{PAGINA_GANADORES}'.")
+
+    hoy = dt.date.today()
+    cards = section.setdefault("data", {}).setdefault("cards", [])
+    nuevas = [{
+        "id": f"sorteo-{sorteo_id}-{g['puesto']}",
+        "winner": html.escape(enmascarar(g["payer_name"]) or "Ganador"),
+        "prize": html.escape(premio or ""),
+        "ticket": g["ticket"],
+        "date": f"{MESES[hoy.month - 1]} {hoy.year}",
+    } for g in ganadores]
+    section["data"]["cards"] = nuevas + [c for c in cards if not str(c.get("id", "")).startswith(f"sorteo-{sorteo_id}-")]
+    content_path.write_text(json.dumps(content, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def main(seed: str, n: int, filtro: str | None, premio: str | None, guardar: bool, publicar: bool, verificar: int | None):
+    conn = open_db()
+    ensure_schema(conn)
+    conn.row_factory = sqlite3.Row
+    attach_archive(conn)
+
+    if verificar is not None:
+        sorteo = conn.execute("SELECT * FROM sorteos WHERE id = ?", (verificar,)).fetchone()
+        if not sorteo:
+            raise SystemExit(f"[sorteo] No existe el sorteo {verificar}.")
+        seed, n, filtro, corte = sorteo["seed"], sorteo["ganadores"], sorteo["filtro"], sorteo["corte"]
+        guardados = [r["numero_operacion"] for r in conn.execute(
+            "SELECT numero_operacion FROM sorteo_ganadores WHERE sorteo_id = ? ORDER BY puesto", (verificar,))]
+        ganadores, total_pagos, _, sha = sortear(iter_participantes(conn, filtro, corte), seed, n)
+        # primero los participantes: si cambiaron, el resultado distinto no prueba nada
+        if sorteo["participantes_sha256"] and sha != sorteo["participantes_sha256"]:
+            print(f"[sorteo] Verificación del sorteo {verificar}: LOS PARTICIPANTES CAMBIARON "
+                  f"({total_pagos} pagos hoy contra {sorteo['participantes']}; hash {sha[:12]} ≠ {sorteo['participantes_sha256'][:12]}). "
+                  "No se puede re-ejecutar con estos datos.")
+            return 2
+        ok = guardados == [g["numero_operacion"] for g in ganadores]
+        print(f"[sorteo] Verificación del sorteo {verificar}: {'OK' if ok else 'NO COINCIDE'}")
+        return 0 if ok else 1
+
+    corte = corte_actual(conn, filtro)
+    ganadores, total_pagos, total_chances, sha = sortear(iter_participantes(conn, filtro, corte), seed, n)
+    print(f"[sorteo] Semilla: {seed!r} | Participantes: {total_pagos} pagos, {total_chances} chances")
+    print(f"[sorteo] Corte: {corte} | sha256 participantes: {sha}")
+    for g in ganadores:
+        print(f"[sorteo] {g['puesto']}° {g['ticket']} ({enmascarar(g['payer_name']) or '-'}, {g['chances']} chances)")
+
+    if not (guardar or publicar):
+        return 0
+    sorteo_id = guardar_sorteo(conn, seed, filtro, corte, premio, ganadores, total_pagos, total_chances, sha)
+    print(f"[sorteo] Resultado guardado como sorteo {sorteo_id}. DB: {DB_PATH.resolve()}")
+    # /sorteos/{id} lee el snapshot: se publica ya, sin esperar al próximo sync
+    publish_snapshot_if_changed(conn)
+    if publicar:
+        publicar_ganadores(sorteo_id, premio, ganadores)
+        print(f"[sorteo] Ganadores publicados en {CONTENT_PATH}")
+    return 0
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sorteo reproducible ponderado por chances sobre los pagos aprobados.")
+    ap.add_argument("--seed", help="Semilla pública (p. ej. el número de la Quiniela del día). Misma semilla ⇒ mismos ganadores.")
+    ap.add_argument("--ganadores", type=int, default=1, help="Cantidad de ganadores (por defecto 1)")
+    ap.add_argument("--filtro", help="Filtro LIKE sobre description para limitar el sorteo a una rifa, p. ej. '%%Sorteo Honda%%'")
+    ap.add_argument("--premio", help="Premio que se muestra en la página de ganadores")
+    ap.add_argument("--guardar", action="store_true", help="Guarda el resultado en las tablas sorteos/sorteo_ganadores.")
+    ap.add_argument("--publicar", action="store_true", help="Guarda el resultado y lo agrega a la página de ganadores anteriores.")
+    ap.add_argument("--verificar", type=int, metavar="ID", help="Vuelve a correr un sorteo guardado: compara primero el hash de participantes y después los ganadores.")
+    args = ap.parse_args()
+    if args.verificar is None and not args.seed:
+        ap.error("--seed es obligatorio salvo con --verificar")
+    if args.ganadores < 1:
+        ap.error("--ganadores debe ser al menos 1")
+    raise SystemExit(main(args.seed, args.ganadores, args.filtro, args.premio, args.guardar, args.publicar, args.verificar))
@@ -3,11 +3,15 @@ import requests
 from pathlib import Path
 from dotenv import load_dotenv
 
-DB_PATH = Path("pagos.db")
+from promos import chances_de
 
-SCHEMA = """
-PRAGMA journal_mode=WAL;
+DB_PATH = Path("pagos.db")
+# Pagos viejos que movió scripts/archivar_mp.py
+ARCHIVE_PATH = Path(os.getenv("PAGOS_ARCHIVE", "pagos_archivo.db"))
+# Snapshot de sólo lectura que lee la API; los scripts que escriben lo republican si hubo cambios
+SNAPSHOT_PATH = os.getenv("PAGOS_SNAPSHOT")
 
+PAGOS_DDL = """
 CREATE TABLE IF NOT EXISTS pagos (
   payment_id        INTEGER PRIMARY KEY,
   numero_operacion  TEXT UNIQUE,
@@ -27,20 +31,165 @@ CREATE TABLE IF NOT EXISTS pagos (
   source            TEXT NOT NULL,
   raw               TEXT,
   updated_at        TEXT DEFAULT (datetime('now'))
-);
+)
+"""
+
+# Totales por día × description × status, mantenidos por upsert_pago()
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS pagos_rollup (
+  dia         TEXT NOT NULL,
+  description TEXT NOT NULL DEFAULT '',
+  status      TEXT NOT NULL DEFAULT '',
+  cantidad    INTEGER NOT NULL DEFAULT 0,
+  monto       REAL NOT NULL DEFAULT 0,
+  chances     INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (dia, description, status)
+) WITHOUT ROWID
+"""
+
+# Columnas que lee /verificar (api.py y query_payment.py); el índice las cubre todas
+# para no ir a la fila de pagos, que arrastra el JSON de raw.
+VERIFY_INDEX = "idx_pagos_verificar"
+
+def _m1_base(conn):
+    conn.execute(PAGOS_DDL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagos_numero_operacion ON pagos (numero_operacion)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagos_date_created ON pagos (date_created)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagos_status ON pagos (status)")
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS sync_state (
+        id INTEGER PRIMARY KEY CHECK (id=1),
+        last_synced_at TEXT
+      )
+    """)
+    conn.execute("INSERT OR IGNORE INTO sync_state (id, last_synced_at) VALUES (1, NULL)")
+    # bases creadas antes de que existiera la columna description
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(pagos)")]
+    if 'description' not in columns:
+        conn.execute("ALTER TABLE pagos ADD COLUMN description TEXT")
 
-CREATE INDEX IF NOT EXISTS idx_pagos_numero_operacion ON pagos (numero_operacion);
-CREATE INDEX IF NOT EXISTS idx_pagos_date_created ON pagos (date_created);
-CREATE INDEX IF NOT EXISTS idx_pagos_status ON pagos (status);
+def _m2_rollup(conn):
+    conn.execute(ROLLUP_DDL)
+    rebuild_rollup(conn)
 
-CREATE TABLE IF NOT EXISTS sync_state (
-  id INTEGER PRIMARY KEY CHECK (id=1),
-  last_synced_at TEXT
-);
+def _m3_indice_verificar(conn):
+    # idx_pagos_numero_operacion duplicaba el índice del UNIQUE
+    conn.execute("DROP INDEX IF EXISTS idx_pagos_numero_operacion")
+    conn.execute(f"""
+      CREATE INDEX IF NOT EXISTS {VERIFY_INDEX} ON pagos
+        (numero_operacion, status, amount, currency, date_approved, payer_name, description)
+    """)
 
-INSERT OR IGNORE INTO sync_state (id, last_synced_at) VALUES (1, NULL);
+# Búsqueda de soporte (GET /buscar): sin acentos y con índices de prefijo. rowid = payment_id.
+# La base de archivo tiene su propia pagos_fts; archivar_mp.py mueve las filas junto con los pagos.
+FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pagos_fts USING fts5(
+  payer_name, payer_email, description,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3 4'
+)
 """
 
+def rebuild_fts(conn):
+    conn.execute("DELETE FROM pagos_fts")
+    conn.execute("""
+      INSERT INTO pagos_fts (rowid, payer_name, payer_email, description)
+      SELECT payment_id, payer_name, payer_email, description FROM pagos
+    """)
+
+def _m4_busqueda(conn):
+    conn.execute(FTS_DDL)
+    rebuild_fts(conn)
+
+def _m5_comprobantes(conn):
+    # Comprobantes PDF leídos por extract_comprobantes_mp.py y su conciliación contra pagos
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS comprobantes (
+        file_hash          TEXT PRIMARY KEY,
+        file               TEXT,
+        numero_operacion   TEXT,
+        fecha_impresion    TEXT,
+        fecha_pago         TEXT,
+        monto_bruto        REAL,
+        cargo_mp           REAL,
+        monto_neto         REAL,
+        estado             TEXT,
+        medio_pago         TEXT,
+        cantidad_productos INTEGER,
+        cliente_nombre     TEXT,
+        cliente_email      TEXT,
+        link_detalle       TEXT,
+        texto_raw          TEXT,
+        conciliado         INTEGER NOT NULL DEFAULT 0,
+        procesado_at       TEXT DEFAULT (datetime('now'))
+      )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_comprobantes_numero_operacion ON comprobantes (numero_operacion)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_comprobantes_pendientes ON comprobantes (file_hash) WHERE conciliado = 0")
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS conciliacion (
+        file_hash        TEXT PRIMARY KEY REFERENCES comprobantes(file_hash) ON DELETE CASCADE,
+        numero_operacion TEXT,
+        resultado        TEXT NOT NULL,
+        detalle          TEXT,
+        revisado_at      TEXT DEFAULT (datetime('now'))
+      )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conciliacion_resultado ON conciliacion (resultado)")
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS conciliacion_estado (
+        id INTEGER PRIMARY KEY CHECK (id=1),
+        ultimo_pago_updated_at TEXT
+      )
+    """)
+    conn.execute("INSERT OR IGNORE INTO conciliacion_estado (id, ultimo_pago_updated_at) VALUES (1, NULL)")
+    # para encontrar rápido los pagos que cambiaron desde la última conciliación
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagos_updated_at ON pagos (updated_at)")
+
+def _m6_sorteos(conn):
+    # Sorteos de sortear_mp.py (antes las creaba el propio script)
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS sorteos (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        seed          TEXT NOT NULL,
+        filtro        TEXT,
+        premio        TEXT,
+        ganadores     INTEGER NOT NULL,
+        participantes INTEGER NOT NULL,
+        chances       INTEGER NOT NULL,
+        corte         TEXT,
+        participantes_sha256 TEXT,
+        created_at    TEXT DEFAULT (datetime('now'))
+      )
+    """)
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS sorteo_ganadores (
+        sorteo_id        INTEGER NOT NULL REFERENCES sorteos(id),
+        puesto           INTEGER NOT NULL,
+        numero_operacion TEXT NOT NULL,
+        ticket           TEXT NOT NULL,
+        payer_name       TEXT,
+        chances          INTEGER NOT NULL,
+        PRIMARY KEY (sorteo_id, puesto)
+      )
+    """)
+    # bases con sorteos guardados antes de registrar el corte y el hash de participantes
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(sorteos)")]
+    for col in ("corte", "participantes_sha256"):
+        if col not in columns:
+            conn.execute(f"ALTER TABLE sorteos ADD COLUMN {col} TEXT")
+
+# Cada paso se aplica una sola vez; PRAGMA user_version guarda el último aplicado.
+# No editar pasos ya publicados: agregar uno nuevo al final.
+MIGRATIONS = [
+    ("esquema base (pagos, sync_state)", _m1_base),
+    ("tabla pagos_rollup", _m2_rollup),
+    ("índice de cobertura para /verificar", _m3_indice_verificar),
+    ("índice FTS5 para búsquedas de soporte", _m4_busqueda),
+    ("tablas comprobantes y conciliacion", _m5_comprobantes),
+    ("tablas sorteos y sorteo_ganadores", _m6_sorteos),
+]
+
 def load_env():
     # Cargar el .env unificado desde la raíz del proyecto (web/.env)
     root_env = Path(__file__).resolve().parents[3] / ".env"
@@ -60,15 +209,62 @@ def open_db():
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
-def ensure_schema(conn):
-    conn.executescript(SCHEMA)
-    # check if description column exists
-    cur = conn.execute("PRAGMA table_info(pagos)")
-    columns = [row[1] for row in cur.fetchall()]
-    if 'description' not in columns:
-        print("[sync] Adding 'description' column to 'pagos' table.")
-        conn.execute("ALTER TABLE pagos ADD COLUMN description TEXT")
-    conn.commit()
+def attach_archive(conn, path=ARCHIVE_PATH):
+    """Adjunta la base de archivo como 'archivo' si existe. Devuelve True si quedó adjunta."""
+    if not Path(path).exists():
+        return False
+    conn.execute("ATTACH DATABASE ? AS archivo", (str(path),))
+    return True
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def ensure_schema(conn, hasta: int | None = None):
+    """Aplica sólo las migraciones pendientes (hasta la versión `hasta`, o todas)."""
+    objetivo = len(MIGRATIONS) if hasta is None else hasta
+    version = schema_version(conn)
+    if version >= objetivo:
+        return
+    conn.execute("PRAGMA journal_mode=WAL")
+    for v in range(version + 1, objetivo + 1):
+        descripcion, paso = MIGRATIONS[v - 1]
+        print(f"[sync] Migración {v}: {descripcion}")
+        conn.execute("BEGIN")
+        try:
+            paso(conn)
+            conn.execute(f"PRAGMA user_version = {v}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _rollup_key(date_created, description, status):
+    # día local del pago tal como lo informa MP (YYYY-MM-DD del ISO con offset)
+    return ((date_created or "")[:10] or "sin-fecha", description or "", status or "")
+
+def _rollup_add(conn, key, cantidad, monto, chances):
+    conn.execute("""
+    INSERT INTO pagos_rollup (dia, description, status, cantidad, monto, chances)
+    VALUES (?,?,?,?,?,?)
+    ON CONFLICT(dia, description, status) DO UPDATE SET
+      cantidad=cantidad+excluded.cantidad,
+      monto=monto+excluded.monto,
+      chances=chances+excluded.chances
+    """, (*key, cantidad, monto, chances))
+
+def rebuild_rollup(conn):
+    """Recalcula pagos_rollup desde cero (una sola pasada sobre pagos)."""
+    conn.execute("DELETE FROM pagos_rollup")
+    cur = conn.execute("""
+      SELECT substr(date_created, 1, 10), description, status, COUNT(*), COALESCE(SUM(amount), 0)
+      FROM pagos GROUP BY 1, 2, 3
+    """)
+    n = 0
+    for dia, description, status, cantidad, monto in cur.fetchall():
+        _rollup_add(conn, _rollup_key(dia, description, status), cantidad, monto, cantidad * chances_de(description))
+        n += 1
+    if n:
+        print(f"[sync] pagos_rollup recalculado ({n} grupos).")
 
 def get_checkpoint(conn, days_back_default=2):
     cur = conn.execute("SELECT last_synced_at FROM sync_state WHERE id=1")
@@ -84,6 +280,50 @@ def save_checkpoint(conn, when_utc: dt.datetime):
     conn.execute("UPDATE sync_state SET last_synced_at=? WHERE id=1", (iso,))
     conn.commit()
 
+def _db_mtime_ns(conn):
+    """Última escritura en la base principal de conn (el archivo o su -wal)."""
+    path = Path(next(f for _, name, f in conn.execute("PRAGMA database_list") if name == "main"))
+    return max(p.stat().st_mtime_ns for p in (path, path.with_name(path.name + "-wal")) if p.exists())
+
+def publish_snapshot(conn, dest: Path):
+    """Publica una copia consistente de la DB para la API (api.py con PAGOS_DB=dest).
+
+    Se escribe a un .tmp y se renombra de forma atómica: los workers de la API
+    detectan el inodo nuevo y reabren su conexión sin reiniciar ni ver un archivo
+    a medio copiar. El snapshot queda en modo DELETE para poder abrirse con
+    mode=ro sin archivos -wal/-shm, y con el mtime que tenía la base antes de
+    copiarla, así publish_snapshot_if_changed detecta cualquier escritura posterior.
+    """
+    dest = Path(dest)
+    tmp = dest.with_name(dest.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    marca = _db_mtime_ns(conn)
+    snap = sqlite3.connect(tmp)
+    try:
+        conn.backup(snap)
+        snap.execute("PRAGMA journal_mode=DELETE")
+        snap.commit()
+    finally:
+        snap.close()
+    os.utime(tmp, ns=(marca, marca))
+    os.replace(tmp, dest)
+    print(f"[sync] Snapshot publicado: {dest.resolve()}")
+
+def publish_snapshot_if_changed(conn, dest=SNAPSHOT_PATH):
+    """Republica el snapshot si la base se escribió desde la última publicación.
+
+    La llaman sync_mp.py y los scripts que escriben en pagos.db (sorteos,
+    comprobantes, archivo) para que la API nunca sirva datos viejos.
+    """
+    if not dest:
+        return False
+    dest = Path(dest)
+    if dest.exists() and dest.stat().st_mtime_ns >= _db_mtime_ns(conn):
+        return False
+    publish_snapshot(conn, dest)
+    return True
+
 def canon_op(payment_id):
     return str(payment_id)
 
@@ -104,7 +344,7 @@ def get_user_nickname(token, user_id):
         print(f"[sync] Error de red al obtener nickname para el usuario {user_id}: {e}")
         return None
 
-def upsert_pago(conn, p: dict, token: str):
+def upsert_pago(conn, p: dict, token: str, archivo: bool = False):
     numero_operacion = canon_op(p["id"])
     payer_name = " ".join(filter(None, [p.get("payer",{}).get("first_name"), p.get("payer",{}).get("last_name")])).strip() or None
     if not payer_name:
@@ -112,6 +352,22 @@ def upsert_pago(conn, p: dict, token: str):
         if payer_id:
             payer_name = get_user_nickname(token, payer_id)
     raw_json = json.dumps(p, ensure_ascii=False)
+    prev = conn.execute(
+        "SELECT date_created, description, status, amount FROM pagos WHERE payment_id = ?", (p["id"],)
+    ).fetchone()
+    if archivo:
+        archivado = conn.execute(
+            "SELECT date_created, description, status, amount FROM archivo.pagos WHERE payment_id = ?", (p["id"],)
+        ).fetchone()
+        if archivado:
+            # un pago archivado volvió a cambiar (p. ej. un reembolso): vuelve a la base caliente.
+            # También si ya estaba en main (lote de archivar_mp.py a medio mover): la copia del
+            # archivo quedaría vieja.
+            if prev is None:
+                prev = archivado
+            conn.execute("DELETE FROM archivo.pagos WHERE payment_id = ?", (p["id"],))
+            if conn.execute("SELECT 1 FROM archivo.sqlite_master WHERE type='table' AND name='pagos_fts'").fetchone():
+                conn.execute("DELETE FROM archivo.pagos_fts WHERE rowid = ?", (p["id"],))
     conn.execute("""
     INSERT INTO pagos (
       payment_id, numero_operacion, external_reference, description, status, status_detail,
@@ -153,6 +409,21 @@ def upsert_pago(conn, p: dict, token: str):
       raw_json
     ))
 
+    payer_email = (p.get("payer") or {}).get("email")
+    conn.execute("DELETE FROM pagos_fts WHERE rowid = ?", (p["id"],))
+    conn.execute(
+        "INSERT INTO pagos_fts (rowid, payer_name, payer_email, description) VALUES (?,?,?,?)",
+        (p["id"], payer_name, payer_email, p.get("description")),
+    )
+
+    # rollup incremental: se descuenta la versión anterior del pago y se suma la nueva
+    new = (p.get("date_created"), p.get("description"), p.get("status"), p.get("transaction_amount"))
+    if prev == new:
+        return
+    if prev:
+        _rollup_add(conn, _rollup_key(*prev[:3]), -1, -(prev[3] or 0), -chances_de(prev[1]))
+    _rollup_add(conn, _rollup_key(*new[:3]), 1, new[3] or 0, chances_de(new[1]))
+
 def search_payments(token, begin_iso: str, end_iso: str):
     url = "https://api.mercadopago.com/v1/payments/search"
     headers = {"Authorization": f"Bearer {token}"}
@@ -190,10 +461,11 @@ def get_payment_details(token, payment_id):
         print(f"[sync] Error al obtener detalles para el pago {payment_id}: {e}")
         return None
 
-def main(days_back: int, full_sync: bool = False):
+def main(days_back: int, full_sync: bool = False, snapshot: str | None = None):
     token = load_env()
     conn = open_db()
     ensure_schema(conn)
+    archivo = attach_archive(conn)
 
     now_utc = dt.datetime.now(dt.timezone.utc)
     
@@ -214,6 +486,8 @@ def main(days_back: int, full_sync: bool = False):
         print("[sync] No se encontraron pagos nuevos o actualizados.")
         if not full_sync:
             save_checkpoint(conn, now_utc)
+        # sin pagos nuevos igual puede haber sorteos o archivados sin publicar
+        publish_snapshot_if_changed(conn, snapshot)
         return
 
     print(f"[sync] Se encontraron {len(payment_summaries)} pagos para procesar.")
@@ -229,20 +503,22 @@ def main(days_back: int, full_sync: bool = False):
                 with open("payment_details.log", "a", encoding="utf-8") as f:
                     f.write(json.dumps(p_full, indent=2, ensure_ascii=False))
                     f.write("\n")
-                upsert_pago(conn, p_full, token)
+                upsert_pago(conn, p_full, token, archivo)
                 count += 1
             else:
                 print(f"[sync] No se pudieron obtener los detalles para {payment_id}. Guardando resumen.")
-                upsert_pago(conn, p_summary, token)
+                upsert_pago(conn, p_summary, token, archivo)
 
         if not full_sync:
             save_checkpoint(conn, now_utc)
         
     print(f"[sync] Upserts realizados: {count}. DB: {DB_PATH.resolve()}")
+    publish_snapshot_if_changed(conn, snapshot)
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--days-back", type=int, default=2, help="Rango de días a sincronizar (por defecto 2 días)")
     ap.add_argument("--full-sync", action="store_true", help="Ignora el checkpoint y realiza una sincronización completa de los días especificados.")
+    ap.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Ruta donde publicar el snapshot de sólo lectura para la API (por defecto $PAGOS_SNAPSHOT).")
     args = ap.parse_args()
-    main(args.days_back, args.full_sync)
+    main(args.days_back, args.full_sync, args.snapshot)
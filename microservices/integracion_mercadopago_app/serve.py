@@ -0,0 +1,36 @@
+"""Arranque de producción de api.py con varios workers.
+
+Con --workers, uvicorn crea el socket de escucha sin IPPROTO_TCP y asyncio no
+activa TCP_NODELAY en las conexiones aceptadas. uvicorn escribe los headers y
+el cuerpo de la respuesta por separado, así que Nagle retiene el segundo
+segmento hasta el ACK diferido del cliente (~40 ms por respuesta en keep-alive).
+Acá el socket se abre con TCP_NODELAY, que Linux hereda en cada conexión
+aceptada, y se le pasa a uvicorn por --fd.
+
+    PAGOS_DB=/data/pagos_snapshot.db python serve.py --host 0.0.0.0 --port 8000 --workers 4
+"""
+import os, socket, argparse
+import uvicorn
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+def main(host: str, port: int, workers: int, log_level: str, access_log: bool):
+    sock = bind_socket(host, port)
+    uvicorn.run("api:app", fd=sock.fileno(), workers=workers, log_level=log_level, access_log=access_log)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Levanta la API con varios workers y TCP_NODELAY.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos worker (por defecto uno por vCPU)")
+    ap.add_argument("--log-level", default="warning")
+    ap.add_argument("--access-log", action="store_true", help="Registrar cada request (desactivado por defecto).")
+    args = ap.parse_args()
+    main(args.host, args.port, args.workers, args.log_level, args.access_log)